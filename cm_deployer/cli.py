@@ -1,14 +1,12 @@
 import argparse
 import logging
+import os
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from cm_deployer import __name__, __version__, __copyright__, __logo__
-from cm_deployer.config.generator import generate_configs, save_configs, update_base_config_with_jwk
-from cm_deployer.config.schema import SimplifiedConfig
-from cm_deployer.jwk import JWKGenerator
-from cm_deployer.k8s import ArgoCDInstaller, ArgoCDApplication, ArgoCDAppWaiter, RepoSecretManager, ArgoCDComponentManager, IstioJWKResourceProvisioner
 from cm_deployer.utils.logger import setup_logger
 
 logger = logging.getLogger(__name__)
@@ -27,6 +25,15 @@ REPOSITORIES = {
     }
 }
 
+# Files that must be present in the secrets directory
+REQUIRED_SECRETS = [
+    "kube.conf",
+    "cm-images.json",
+    "cm-stack-main",
+    REPOSITORIES["dependencies"]["key"],
+    REPOSITORIES["base"]["key"]
+]
+
 def parse_args():
     parser = argparse.ArgumentParser(description='CM Stack Deployer')
     parser.add_argument('--config', type=Path, default=Path('config.yaml'),
@@ -45,42 +52,107 @@ def parse_args():
                        help='Path to store JWK files')
     parser.add_argument('--skip-jwk', action='store_true',
                        help='Skip JWK generation')
+    # ArgoCD picks up labeled repository secrets without a restart, so this
+    # flag no longer changes anything and is only accepted for compatibility
     parser.add_argument('--skip-argocd-restart', action='store_true',
-                       help='Skip ArgoCD components restart after creating repository secrets')
+                       help=argparse.SUPPRESS)
     return parser.parse_args()
 
+def check_secrets(secrets_dir: Path) -> None:
+    """Verify that all required files exist in the secrets directory.
+    
+    The directory is listed once and every missing file is reported together.
+    
+    Raises:
+        FileNotFoundError: If the directory or any required file is missing
+    """
+    try:
+        with os.scandir(secrets_dir) as entries:
+            present = {entry.name for entry in entries}
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Secrets directory not found: {secrets_dir}") from None
+    
+    missing = [name for name in REQUIRED_SECRETS if name not in present]
+    if missing:
+        raise FileNotFoundError(f"Required files not found in {secrets_dir}: {', '.join(missing)}")
+
+# Logo lines and their common width, used to center the logo as a block
+_LOGO_LINES = __logo__.splitlines()
+_LOGO_WIDTH = max(map(len, _LOGO_LINES))
+
+# ArgoCD access information, built once and filled with credentials on display
+_ARGOCD_ACCESS_BANNER = "\n".join([
+    "======== ArgoCD Access Information: ========",
+    " NOTE: The below credentials are for advanced setup and debugging mostly.",
+    " You don't need to access Argo CD for the daily use of CM Stack.",
+    " 1. Run the following command to set up port forwarding:",
+    "    kubectl port-forward svc/argocd-server -n argocd 8080:443",
+    " 2. Open your browser and navigate to: https://localhost:8080",
+    " 3. Login with the following credentials:",
+    "    Username: %(username)s",
+    "    Password: %(password)s",
+    " NOTE: If your local port 8080 is in use by another process, pls use a different port.",
+    " NOTE: You may see a certificate warning in your browser. This is expected.",
+    "=============================================",
+])
+
+# Separator for the deployment summary
+_BAR = "=" * 50
+
 def display_argocd_access(credentials):
     """Display ArgoCD access information."""
-    logger.info("======== ArgoCD Access Information: ========")
-    logger.info(" NOTE: The below credentials are for advanced setup and debugging mostly.")
-    logger.info(" You don't need to access Argo CD for the daily use of CM Stack.")
-    logger.info(" 1. Run the following command to set up port forwarding:")
-    logger.info("    kubectl port-forward svc/argocd-server -n argocd 8080:443")
-    logger.info(" 2. Open your browser and navigate to: https://localhost:8080")
-    logger.info(" 3. Login with the following credentials:")
-    logger.info(f"    Username: {credentials['username']}")
-    logger.info(f"    Password: {credentials['password']}")
-    logger.info(" NOTE: If your local port 8080 is in use by another process, pls use a different port.")
-    logger.info(" NOTE: You may see a certificate warning in your browser. This is expected.")
-    logger.info("=============================================")
+    logger.info(_ARGOCD_ACCESS_BANNER, credentials)
 
-def main():
-    # Print the logo
-    terminal_width = shutil.get_terminal_size().columns    
-    centered_logo = '\n'.join(line.center(terminal_width) for line in __logo__.splitlines())
-    print(centered_logo, file=sys.stdout)
-    print(f"{__name__} v{__version__} {__copyright__}\n".center(terminal_width), file=sys.stdout)
+def wait_argocd_ready(argocd, component_manager) -> bool:
+    """Wait for the ArgoCD server and then for all ArgoCD pods.
     
+    Returns:
+        bool: False if the ArgoCD server did not become ready
+    """
+    logger.info("Waiting for ArgoCD server to be ready...")
+    if not argocd.wait_ready():
+        return False
+    
+    # Wait for all ArgoCD pods to become ready initially
+    logger.info("Waiting for all ArgoCD pods to become ready initially...")
+    if not component_manager.wait_for_all_argocd_pods_ready():
+        logger.warning("Some ArgoCD pods are not ready. Proceeding anyway, but there might be issues.")
+    else:
+        logger.info("All ArgoCD pods are initially ready")
+    return True
+
+def main():
+    # Print the logo, centered as a block, with a single write
+    terminal_width = shutil.get_terminal_size().columns
+    padding = " " * max(0, (terminal_width - _LOGO_WIDTH) // 2)
+    banner = f"{__name__} v{__version__} {__copyright__}\n".center(terminal_width)
+    sys.stdout.write("\n".join(padding + line if line else line for line in _LOGO_LINES) + f"\n{banner}\n")
     
     # Proceed with initialization
     args = parse_args()
     setup_logger(debug=args.debug)
+    if args.skip_argocd_restart:
+        logger.warning("--skip-argocd-restart is deprecated and has no effect, ArgoCD components are no longer restarted")
+
+    # Deferred so that --help and argument errors don't pay for loading
+    # the deployment modules; JWK dependencies are imported only when used
+    from cm_deployer.config.generator import generate_configs, save_configs, save_base_config, update_base_config_with_jwk
+    from cm_deployer.config.schema import SimplifiedConfig
+    from cm_deployer.k8s import ArgoCDInstaller, ArgoCDApplication, ArgoCDAppWaiter, RepoSecretManager, ArgoCDComponentManager, IstioJWKResourceProvisioner
 
     try:
-        # Verify kubeconfig exists
-        kubeconfig = args.secrets_dir / "kube.conf"
-        if not kubeconfig.exists():
-            raise FileNotFoundError(f"Kubeconfig not found at {kubeconfig}")
+        # Verify kubeconfig and all required keys exist before doing anything
+        check_secrets(args.secrets_dir)
+
+        # Resolve the directories once and build every path used below from them
+        secrets_dir = args.secrets_dir.resolve()
+        output_dir = args.output_dir.resolve()
+        jwk_dir = args.jwk_dir.resolve()
+        kubeconfig = secrets_dir / "kube.conf"
+        deps_info = REPOSITORIES["dependencies"]
+        deps_key_path = secrets_dir / deps_info["key"]
+        base_info = REPOSITORIES["base"]
+        base_key_path = secrets_dir / base_info["key"]
 
         # Load configuration to get target revisions
         config = SimplifiedConfig.from_yaml(args.config)
@@ -92,8 +164,19 @@ def main():
 
         # Generate configurations
         logger.info("Generating configurations...")
-        deps_config, base_config = generate_configs(args.config, args.secrets_dir)
-        save_configs(deps_config, base_config, args.output_dir)
+        deps_config, base_config = generate_configs(args.config, secrets_dir, config=config)
+        save_configs(deps_config, base_config, output_dir)
+
+        # Start JWK generation for stack-base in the background, it only
+        # touches local files and is ready long before the base app is needed
+        jwk_future = None
+        if not args.skip_base and not args.skip_jwk:
+            from cm_deployer.jwk import JWKGenerator
+
+            logger.info("Generating JWK for stack-base...")
+            jwk_executor = ThreadPoolExecutor(max_workers=1)
+            jwk_future = jwk_executor.submit(JWKGenerator(base_dir=jwk_dir).generate_jwk_in_memory)
+            jwk_executor.shutdown(wait=False)
 
         # Install ArgoCD (basic installation)
         logger.info("Installing ArgoCD (basic installation)...")
@@ -101,60 +184,33 @@ def main():
         if not argocd.install():
             raise RuntimeError("Failed to install ArgoCD")
 
-        logger.info("Waiting for ArgoCD server to be ready...")
-        if not argocd.wait_ready():
-            raise RuntimeError("ArgoCD server failed to become ready")
-        
         # Initialize component manager to use for all ArgoCD operations
         component_manager = ArgoCDComponentManager(kubeconfig=kubeconfig)
-        
-        # Wait for all ArgoCD pods to become ready initially
-        logger.info("Waiting for all ArgoCD pods to become ready initially...")
-        if not component_manager.wait_for_all_argocd_pods_ready():
-            logger.warning("Some ArgoCD pods are not ready. Proceeding anyway, but there might be issues.")
-        else:
-            logger.info("All ArgoCD pods are initially ready")
 
         # Create repository secrets for ArgoCD
         logger.info("Creating repository secrets for ArgoCD...")
         repo_secret_manager = RepoSecretManager(kubeconfig=kubeconfig)
         
-        # Create secret for dependencies repository
-        deps_info = REPOSITORIES["dependencies"]
-        deps_key_path = args.secrets_dir / deps_info["key"]
-        if not deps_key_path.exists():
-            raise FileNotFoundError(f"Dependencies SSH key not found: {deps_key_path}")
-            
-        if not repo_secret_manager.create_repo_secret(
-            secret_name=deps_info["name"],
-            repo_url=deps_info["url"],
-            ssh_key_path=deps_key_path
-        ):
-            raise RuntimeError(f"Failed to create repository secret for {deps_info['name']}")
-            
-        # Create secret for base repository
-        base_info = REPOSITORIES["base"]
-        base_key_path = args.secrets_dir / base_info["key"]
-        if not base_key_path.exists():
-            raise FileNotFoundError(f"Base SSH key not found: {base_key_path}")
-            
-        if not repo_secret_manager.create_repo_secret(
-            secret_name=base_info["name"],
-            repo_url=base_info["url"],
-            ssh_key_path=base_key_path
-        ):
-            raise RuntimeError(f"Failed to create repository secret for {base_info['name']}")
-
-        # Restart ArgoCD components to refresh repository configuration
-        if not args.skip_argocd_restart:
-            logger.info("Restarting ArgoCD components to refresh repository configuration...")
-            if not component_manager.restart_argocd_components():
-                logger.warning("Failed to restart some ArgoCD components. This might lead to repository access issues.")
-                logger.warning("If you encounter issues, you may need to manually restart ArgoCD pods.")
-            else:
-                logger.info("All ArgoCD components have been restarted and are ready")
-        else:
-            logger.info("Skipping ArgoCD components restart as requested")
+        # The secrets only need the argocd namespace, which the install has
+        # already created. Create them first, concurrently, so a failure
+        # aborts right away instead of after the readiness wait
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                executor.submit(
+                    repo_secret_manager.create_repo_secret,
+                    secret_name=repo_info["name"],
+                    repo_url=repo_info["url"],
+                    ssh_key_path=key_path
+                ): repo_info
+                for repo_info, key_path in ((deps_info, deps_key_path), (base_info, base_key_path))
+            }
+            failed = [futures[future]["name"] for future in as_completed(futures) if not future.result()]
+        
+        if failed:
+            raise RuntimeError(f"Failed to create repository secret for {', '.join(failed)}")
+        
+        if not wait_argocd_ready(argocd, component_manager):
+            raise RuntimeError("ArgoCD server failed to become ready")
 
         # Initialize application manager and waiter
         app_manager = ArgoCDApplication(kubeconfig=kubeconfig)
@@ -185,17 +241,11 @@ def main():
 
         if not args.skip_base:
             # Provisionin JWK for stack-base (unless skipped)
-            if not args.skip_jwk:
-                logger.info("Generating JWK for stack-base...")
-                # Use JWKGenerator to generate the keys
-                jwk_generator = JWKGenerator(base_dir=args.jwk_dir)
-                if not jwk_generator.generate_jwk():
-                    raise RuntimeError("Failed to generate JWK")
-                
-                # Read JWK files
-                private_key, jwk = jwk_generator.read_jwk_files()
+            if jwk_future:
+                # Collect the keys generated in the background
+                private_key, jwk = jwk_future.result()
                 if not private_key or not jwk:
-                    raise RuntimeError("Failed to read JWK files")
+                    raise RuntimeError("Failed to generate JWK")
                 
                 # Use IstioJWKResourceProvisioner to create Kubernetes resources
                 logger.info("Provisioning Istio JWK resources...")
@@ -206,14 +256,14 @@ def main():
                 # Update base_config with JWK content
                 logger.info("Updating base configuration with JWK...")
                 base_config = update_base_config_with_jwk(base_config, jwk)
+                
+                # Save updated base configuration, deps config has not changed
+                save_base_config(base_config, output_dir)
             else:
                 logger.info("Skipping JWK generation as requested")
                 # Warn if JWK is likely needed
                 logger.warning("Note: Stack Base typically requires JWK configuration. Make sure it's already set up.")
             
-            # Save updated configuration
-            save_configs(deps_config, base_config, args.output_dir)
-            
             # Apply Base application with target revision
             logger.info(f"Applying Base application with target revision: {base_revision}...")
             if not app_manager.create_base_app(base_config, target_revision=base_revision):
@@ -237,20 +287,22 @@ def main():
         # Get ArgoCD credentials for final display
         credentials = argocd.get_argocd_credentials()
 
-        # Display success message and access instructions
-        logger.info("\n")
-        logger.info("="*50)
-        logger.info("DEPLOYMENT COMPLETED SUCCESSFULLY!")
-        logger.info("="*50 + "\n")
-        
-        logger.info("To access the ArgoCD UI:")
-        display_argocd_access(credentials)
-        
-        logger.info("To access your deployed applications:")
+        # Display success message and access instructions as one log record
+        summary = [
+            "",
+            _BAR,
+            "DEPLOYMENT COMPLETED SUCCESSFULLY!",
+            _BAR,
+            "",
+            "To access the ArgoCD UI:",
+            _ARGOCD_ACCESS_BANNER % credentials,
+            "To access your deployed applications:",
+        ]
         if not args.skip_deps:
-            logger.info("Stack Dependencies: Check ArgoCD UI dependencies status")
+            summary.append("Stack Dependencies: Check ArgoCD UI dependencies status")
         if not args.skip_base:
-            logger.info(f"Stack Base: Access via the URLs configured in your domain (https://portal.{base_config.get('base_domain', 'unknown')})")
+            summary.append(f"Stack Base: Access via the URLs configured in your domain (https://portal.{base_config.get('base_domain', 'unknown')})")
+        logger.info("\n".join(summary))
         
         return 0
 
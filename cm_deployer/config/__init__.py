@@ -1,19 +1,25 @@
-from .generator import generate_configs, save_configs, update_base_config_with_jwk
+from .generator import generate_configs, save_configs, save_base_config, update_base_config_with_jwk
 from .schema import SimplifiedConfig, GPUType
+from functools import lru_cache
 from pathlib import Path
 import yaml
 
+from cm_deployer.utils.files import SafeLoader
+
+@lru_cache(maxsize=1)
 def load_defaults() -> dict:
     """Load default values from the defaults file.
     
+    The file is parsed once per process; callers must not modify the result.
+    
     Returns:
         dict: Default values
     """
     defaults_path = Path(__file__).parent / "defaults.yaml"
     if defaults_path.exists():
-        with open(defaults_path, 'r') as f:
-            return yaml.safe_load(f)
+        with open(defaults_path, 'rb') as f:
+            return yaml.load(f, Loader=SafeLoader)
     return {}
 
-__all__ = ['generate_configs', 'save_configs', 'update_base_config_with_jwk', 
+__all__ = ['generate_configs', 'save_configs', 'save_base_config', 'update_base_config_with_jwk', 
            'SimplifiedConfig', 'GPUType', 'load_defaults']
\ No newline at end of file
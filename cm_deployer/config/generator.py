@@ -1,9 +1,16 @@
-import json
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any
 import yaml
 
 from .schema import SimplifiedConfig, GPUType
+from cm_deployer.utils.files import SafeDumper
+
+@lru_cache(maxsize=None)
+def _read_file_cached(path: str, mtime_ns: int) -> str:
+    """Read file content; mtime_ns is part of the cache key only."""
+    return Path(path).read_text()
 
 class ConfigGenerator:
     def __init__(self, config: SimplifiedConfig, secrets_dir: Path):
@@ -18,9 +25,11 @@ class ConfigGenerator:
 
     def _read_file_content(self, path: Path) -> str:
         """Read file content as string."""
-        if not path.exists():
-            raise FileNotFoundError(f"Required file not found: {path}")
-        return path.read_text()
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Required file not found: {path}") from None
+        return _read_file_cached(str(path), mtime_ns)
 
     def _load_registry_auth(self) -> str:
         """Load registry authentication JSON as string."""
@@ -56,22 +65,24 @@ class ConfigGenerator:
         """
         # Load required secrets as raw strings
         cm_image_registry_auth = self._load_registry_auth()
-        cm_stack_deps_repo_key = self._load_repo_key('cm-stack-dependencies')
-        cm_stack_base_repo_key = self._load_repo_key('cm-stack-base')  # Used for Argo CD repo secret, not for Helm values
         cm_stack_main_repo_key = self._load_repo_key('cm-stack-main')  # This is what gets passed to Helm values
         cert, key = self._load_tls_cert() if self.config.tls.use_own_cert else (None, None)
 
+        # Bind the config sections once instead of walking self.config each time
+        tls = self.config.tls
+        backup = self.config.database_backup
+
         base_config = {
             'base_domain': self.config.base_domain,
             
             'tls': {
-                'enabled': self.config.tls.enabled,
+                'enabled': tls.enabled,
                 'certManager': {
-                    'enabled': self.config.tls.enabled and not self.config.tls.use_own_cert,
-                    'email': self.config.tls.email
+                    'enabled': tls.enabled and not tls.use_own_cert,
+                    'email': tls.email
                 },
                 'ownCert': {
-                    'useOwnCert': self.config.tls.use_own_cert,
+                    'useOwnCert': tls.use_own_cert,
                     'fullchainCertificate': cert,
                     'privateKey': key
                 }
@@ -79,12 +90,12 @@ class ConfigGenerator:
 
             'db': {
                 'backup': {
-                    'enabled': self.config.database_backup.enabled,
+                    'enabled': backup.enabled,
                     'volumeSnapshot': {
                         'className': self.config.storage.snapshot_class
                     },
-                    'retentionPolicy': f"{self.config.database_backup.retention_days}d",
-                    'schedule': self.config.database_backup.schedule
+                    'retentionPolicy': f"{backup.retention_days}d",
+                    'schedule': backup.schedule
                 }
             },
 
@@ -97,10 +108,18 @@ class ConfigGenerator:
 
         return base_config
 
-def generate_configs(config_path: Path, secrets_dir: Path) -> Tuple[dict, dict]:
-    """Generate both configurations from simplified config file."""
+def generate_configs(config_path: Path, secrets_dir: Path,
+                     config: Optional[SimplifiedConfig] = None) -> Tuple[dict, dict]:
+    """Generate both configurations from simplified config file.
+    
+    Args:
+        config_path: Path to the simplified configuration file
+        secrets_dir: Path to directory containing secrets
+        config: Already loaded configuration. If given, config_path is not re-read.
+    """
     # Load and validate configuration
-    config = SimplifiedConfig.from_yaml(config_path)
+    if config is None:
+        config = SimplifiedConfig.from_yaml(config_path)
     config.validate()
 
     # Generate configurations
@@ -118,25 +137,51 @@ def update_base_config_with_jwk(base_config: Dict[str, Any], jwk_content: str) -
         jwk_content: The JWK content as a string
         
     Returns:
-        The updated base configuration
+        The updated base configuration. Only the top level and the istio
+        section are copied; base_config itself is left unchanged.
     """
-    # Create a deep copy to avoid modifying the original
-    updated_config = base_config.copy()
-    
     # Add the istio.jwkConfig value
-    if 'istio' not in updated_config:
-        updated_config['istio'] = {}
-    
-    updated_config['istio']['jwkConfig'] = jwk_content
+    return {
+        **base_config,
+        'istio': {**base_config.get('istio', {}), 'jwkConfig': jwk_content}
+    }
+
+# Largest width the libyaml emitter accepts, effectively no line folding
+_UNLIMITED_WIDTH = 2**31 - 1
+
+def _dump(data: dict) -> bytes:
+    """Serialize a configuration to UTF-8 encoded YAML.
     
-    return updated_config
+    Block style is the default, and an unlimited width skips line folding
+    of long values.
+    """
+    return yaml.dump(data, Dumper=SafeDumper, sort_keys=False, allow_unicode=True,
+                     width=_UNLIMITED_WIDTH, encoding='utf-8')
 
-def save_configs(deps_config: dict, base_config: dict, output_dir: Path) -> None:
-    """Save generated configurations to files."""
+def _save(files: Dict[str, dict], output_dir: Path) -> None:
+    """Save generated configurations to YAML files.
+    
+    Everything is serialized before anything is written, so a serialization
+    error leaves the existing files alone. Each file is written to a
+    temporary name and renamed into place.
+    
+    Args:
+        files: Mapping of file name to configuration
+        output_dir: Directory to write the files to
+    """
+    contents = {name: _dump(data) for name, data in files.items()}
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    with open(output_dir / 'deps-values.yaml', 'w') as f:
-        yaml.dump(deps_config, f, default_flow_style=False)
+    for name, content in contents.items():
+        path = output_dir / name
+        tmp_path = path.with_name(f"{name}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+def save_base_config(base_config: dict, output_dir: Path) -> None:
+    """Save generated base configuration to file."""
+    _save({'base-values.yaml': base_config}, output_dir)
 
-    with open(output_dir / 'base-values.yaml', 'w') as f:
-        yaml.dump(base_config, f, default_flow_style=False)
\ No newline at end of file
+def save_configs(deps_config: dict, base_config: dict, output_dir: Path) -> None:
+    """Save generated configurations to files."""
+    _save({'deps-values.yaml': deps_config, 'base-values.yaml': base_config}, output_dir)
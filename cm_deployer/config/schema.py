@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import yaml
 
+from cm_deployer.utils.files import SafeLoader
+
 class GPUType(Enum):
     NONE = "none"
     NVIDIA = "nvidia"
@@ -43,9 +46,20 @@ class SimplifiedConfig:
 
     @classmethod
     def from_yaml(cls, path: Path) -> 'SimplifiedConfig':
-        """Load and validate configuration from YAML file."""
-        with open(path) as f:
-            data = yaml.safe_load(f)
+        """Load and validate configuration from YAML file.
+        
+        Parsed configurations are cached by path and modification time, so
+        loading an unchanged file again returns the same object without
+        re-parsing it. Callers must not modify the result.
+        """
+        path = Path(path).resolve()
+        return _load_config(str(path), path.stat().st_mtime_ns)
+
+    @classmethod
+    def _parse_yaml(cls, path: Path) -> 'SimplifiedConfig':
+        """Parse configuration from YAML file."""
+        with open(path, 'rb') as f:
+            data = yaml.load(f, Loader=SafeLoader)
 
         # Handle git_revision configuration if present
         git_revision = GitRevisionConfig()
@@ -87,4 +101,9 @@ class SimplifiedConfig:
         if not 1 <= self.database_backup.retention_days <= 30:
             raise ValueError("retention_days must be between 1 and 30")
         
-        # Add more validation as needed
\ No newline at end of file
+        # Add more validation as needed
+
+@lru_cache(maxsize=8)
+def _load_config(path: str, mtime_ns: int) -> SimplifiedConfig:
+    """Parse a configuration file; mtime_ns is part of the cache key only."""
+    return SimplifiedConfig._parse_yaml(Path(path))
@@ -1,16 +1,52 @@
+import base64
+from functools import lru_cache
 from pathlib import Path
 import json
 import logging
-from typing import Dict, Any, Tuple
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
 
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
-from authlib.jose import JsonWebKey
 
 # Get logger
 logger = logging.getLogger(__name__)
 
 
+def _int_to_base64url(value: int) -> str:
+    """Encode an integer as unpadded big-endian base64url."""
+    data = value.to_bytes((value.bit_length() + 7) // 8 or 1, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+@lru_cache(maxsize=4)
+def _load_private_key(path: str, mtime_ns: int) -> Tuple[rsa.RSAPrivateKey, bytes]:
+    """Load a PEM private key; mtime_ns is part of the cache key only.
+    
+    Returns:
+        Tuple containing (private_key, private_key_pem)
+    """
+    private_pem = Path(path).read_bytes()
+    private_key = serialization.load_pem_private_key(
+        private_pem,
+        password=None
+    )
+    return private_key, private_pem
+
+
+# One lock per JWK directory, so concurrent generators don't race on its files
+_base_dir_locks: Dict[str, threading.Lock] = {}
+_base_dir_locks_guard = threading.Lock()
+
+
+def _base_dir_lock(base_dir: Path) -> threading.Lock:
+    """Get the lock serializing JWK generation in a directory."""
+    key = str(base_dir.resolve())
+    with _base_dir_locks_guard:
+        return _base_dir_locks.setdefault(key, threading.Lock())
+
+
 class JWKGenerator:
     """Class for generating JWK (JSON Web Key) files."""
     
@@ -42,34 +78,69 @@ class JWKGenerator:
         Returns:
             The generated RSA private key
         """
+        private_key, _ = self._generate_rsa_key_pair()
+        return private_key
+    
+    def _generate_rsa_key_pair(self) -> Tuple[rsa.RSAPrivateKey, bytes]:
+        """Generate RSA key pair and save to files.
+        
+        Returns:
+            Tuple containing (private_key, private_key_pem)
+        """
         logger.debug("Generating new RSA key pair")
         private_key = rsa.generate_private_key(
             public_exponent=65537,
             key_size=2048
         )
         
-        # Save private key
         private_pem = private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption()
         )
-        self.private_key_path.write_bytes(private_pem)
-        logger.debug(f"Private key saved to {self.private_key_path}")
         
-        # Save public key
         public_key = private_key.public_key()
         public_pem = public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
-        self.public_key_path.write_bytes(public_pem)
+        
+        # Save private and public key together
+        self._write_files({
+            self.private_key_path: private_pem,
+            self.public_key_path: public_pem
+        })
+        logger.debug(f"Private key saved to {self.private_key_path}")
         logger.debug(f"Public key saved to {self.public_key_path}")
         
-        return private_key
+        return private_key, private_pem
+    
+    def _load_or_generate_private_key(self) -> Tuple[rsa.RSAPrivateKey, bytes]:
+        """Load the existing private key, or generate a new key pair if there is none.
+        
+        Returns:
+            Tuple containing (private_key, private_key_pem)
+        """
+        # Check if private key exists
+        if self.private_key_path.exists():
+            logger.debug(f"Loading existing private key from {self.private_key_path}")
+            try:
+                # Load existing private key, parsed once per file version
+                return _load_private_key(
+                    str(self.private_key_path.resolve()),
+                    self.private_key_path.stat().st_mtime_ns
+                )
+            except Exception as e:
+                logger.error(f"Error loading private key: {e}")
+                logger.debug("Generating new key pair instead")
+        else:
+            logger.debug("Private key does not exist, generating new key pair")
+        
+        # Generate new key pair
+        return self._generate_rsa_key_pair()
     
     def create_jwk(self, private_key: rsa.RSAPrivateKey) -> Dict[str, Any]:
-        """Create JWK from private key.
+        """Create the public JWK for a private key.
         
         Args:
             private_key: RSA private key
@@ -79,35 +150,18 @@ class JWKGenerator:
         """
         logger.debug("Creating JWK from private key")
         
-        # Extract public key and convert to PEM format first
-        public_key = private_key.public_key()
-        public_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        
-        logger.debug("Converting public key to JWK")
-        # Create JWK from PEM-formatted public key
-        try:
-            # Using PEM instead of direct key object
-            jwk = JsonWebKey.import_key(public_pem)
-            jwk_dict = jwk.as_dict()
-            
-            logger.debug("Adding header parameters to JWK")
-            # Add additional parameters from header
-            jwk_dict.update({
-                "use": "sig",
-                "alg": self.HEADER["alg"],
-                "typ": self.HEADER["typ"],
-                "kid": self.HEADER["kid"]
-            })
-            
-            return jwk_dict
-        except Exception as e:
-            logger.error(f"Error creating JWK: {e}")
-            logger.debug(f"Public key type: {type(public_key)}")
-            logger.debug(f"Public PEM type: {type(public_pem)}")
-            raise
+        # Build the RSA members (RFC 7518 section 6.3.1) directly from the
+        # public numbers, and add the parameters from the header
+        public_numbers = private_key.public_key().public_numbers()
+        return {
+            "n": _int_to_base64url(public_numbers.n),
+            "e": _int_to_base64url(public_numbers.e),
+            "kty": "RSA",
+            "kid": self.HEADER["kid"],
+            "use": "sig",
+            "alg": self.HEADER["alg"],
+            "typ": self.HEADER["typ"]
+        }
     
     def generate_jwk(self) -> Dict[str, Any]:
         """Generate JWK and save it to file.
@@ -115,25 +169,98 @@ class JWKGenerator:
         Returns:
             The JWKS as a dictionary
         """
-        # Check if private key exists
-        if self.private_key_path.exists():
-            logger.debug(f"Loading existing private key from {self.private_key_path}")
-            try:
-                # Load existing private key
-                with open(self.private_key_path, "rb") as f:
-                    private_key = serialization.load_pem_private_key(
-                        f.read(),
-                        password=None
-                    )
-            except Exception as e:
-                logger.error(f"Error loading private key: {e}")
-                logger.debug("Generating new key pair instead")
-                private_key = self.generate_rsa_key_pair()
-        else:
-            logger.debug("Private key does not exist, generating new key pair")
-            # Generate new key pair
-            private_key = self.generate_rsa_key_pair()
+        _, jwks, _ = self._get_or_create_jwks()
+        return jwks
+    
+    def generate_jwk_in_memory(self) -> Tuple[str, str]:
+        """Generate JWK and return the key material directly.
+        
+        The files are still written to base_dir for inspection, but the
+        caller gets the same values as read_jwk_files() without reading
+        them back from disk.
         
+        Returns:
+            Tuple containing (private_key_str, jwk_json_str)
+        """
+        private_pem, _, jwks_json = self._get_or_create_jwks()
+        return private_pem.decode('utf-8'), jwks_json
+    
+    def _get_or_create_jwks(self) -> Tuple[bytes, Dict[str, Any], str]:
+        """Reuse the existing JWK files or generate them.
+        
+        Calls for the same base_dir are serialized, so concurrent callers do
+        not generate competing keys; the ones that wait simply reuse the
+        files written by the first.
+        
+        Returns:
+            Tuple containing (private_key_pem, jwks_dict, jwks_json_str)
+        """
+        with _base_dir_lock(self.base_dir):
+            existing = self._read_existing_jwks()
+            if existing:
+                return existing
+            
+            private_key, private_pem = self._load_or_generate_private_key()
+            jwks, jwks_json = self._save_jwks(private_key)
+            return private_pem, jwks, jwks_json
+    
+    def _read_existing_jwks(self) -> Optional[Tuple[bytes, Dict[str, Any], str]]:
+        """Read previously generated key material if it is complete and current.
+        
+        The JWKS is only reused when both files exist, the JWKS parses, it
+        is not older than the private key, and its modulus matches the key.
+        This skips deriving and writing the JWKS again.
+        
+        Returns:
+            Tuple containing (private_key_pem, jwks_dict, jwks_json_str),
+            or None if the JWK has to be generated
+        """
+        try:
+            key_mtime = self.private_key_path.stat().st_mtime_ns
+            jwk_mtime = self.jwk_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        
+        if jwk_mtime < key_mtime:
+            logger.debug("JWKS file is older than the private key, regenerating it")
+            return None
+        
+        try:
+            jwks_json = self.jwk_path.read_text()
+            jwks = json.loads(jwks_json)
+            private_key, private_pem = _load_private_key(
+                str(self.private_key_path.resolve()),
+                key_mtime
+            )
+        except (OSError, ValueError) as e:
+            logger.debug(f"Existing JWK files are not usable, regenerating: {e}")
+            return None
+        
+        if not isinstance(jwks, dict) or not jwks.get("keys"):
+            logger.debug("Existing JWKS file has no keys, regenerating it")
+            return None
+        
+        # Catch keys restored with their timestamps (cp -p, backups)
+        if (not isinstance(private_key, rsa.RSAPrivateKey) or not isinstance(jwks["keys"][0], dict)
+                or jwks["keys"][0].get("n") != _int_to_base64url(private_key.public_key().public_numbers().n)):
+            logger.debug("Existing JWKS does not match the private key, regenerating it")
+            return None
+        
+        logger.debug(f"Reusing existing JWK files from {self.base_dir}")
+        return private_pem, jwks, jwks_json
+    
+    def _save_jwks(self, private_key: rsa.RSAPrivateKey) -> Tuple[Dict[str, Any], str]:
+        """Create JWKS from private key and save it to file.
+        
+        The JWKS is serialized once; the same text is written to the file
+        and returned to the caller.
+        
+        Args:
+            private_key: RSA private key
+            
+        Returns:
+            Tuple containing (jwks_dict, jwks_json_str)
+        """
         # Create JWK
         logger.debug("Creating JWK")
         jwk_dict = self.create_jwk(private_key)
@@ -141,14 +268,33 @@ class JWKGenerator:
         # Create JWKS
         logger.debug("Creating JWKS")
         jwks = {"keys": [jwk_dict]}
+        jwks_json = json.dumps(jwks, separators=(',', ':'))
         
         # Save JWKS to file
         logger.debug(f"Saving JWKS to {self.jwk_path}")
-        with open(self.jwk_path, "w") as f:
-            json.dump(jwks, f, indent=2)
+        self._write_files({self.jwk_path: jwks_json.encode('utf-8')})
         
-        return jwks
+        return jwks, jwks_json
 
+    @staticmethod
+    def _write_files(files: Dict[Path, bytes]) -> None:
+        """Write files through temporary names and atomic renames.
+        
+        All contents are written before any file is replaced, so an
+        interrupted run never leaves a truncated key behind.
+        
+        Args:
+            files: Mapping of target path to content
+        """
+        tmp_paths = {}
+        for path, content in files.items():
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            tmp_path.write_bytes(content)
+            tmp_paths[tmp_path] = path
+        
+        for tmp_path, path in tmp_paths.items():
+            os.replace(tmp_path, path)
+    
     def read_jwk_files(self) -> Tuple[str, str]:
         """Read JWK files.
         
@@ -172,8 +318,7 @@ class JWKGenerator:
         
         # Read JWK JSON
         logger.debug(f"Reading JWKS from {self.jwk_path}")
-        with open(self.jwk_path, "r") as f:
-            jwks_json = json.load(f)
+        jwks_json = json.loads(self.jwk_path.read_bytes())
         
         # Return the private key and the JWK dictionary
-        return private_key_pem, json.dumps(jwks_json, indent=2)
\ No newline at end of file
+        return private_key_pem, json.dumps(jwks_json, separators=(',', ':'))
\ No newline at end of file
@@ -1,85 +1,138 @@
 import logging
 import subprocess
 import yaml
-import tempfile
 import os
 from pathlib import Path
 from typing import Dict, Optional, Any, List
 
-from cm_deployer.templates import get_template_path
+from cm_deployer.config import load_defaults
+from cm_deployer.k8s.session import find_kubectl
+from cm_deployer.utils.files import SafeDumper
 
 logger = logging.getLogger(__name__)
 
+# Git repositories of the stack charts
+DEPENDENCIES_REPO_URL = "git@github.com:ConfidentialMind/stack-dependencies.git"
+BASE_REPO_URL = "git@github.com:ConfidentialMind/stack-base.git"
+
+# Escapes for multi-line strings passed as Helm parameters
+_PARAM_ESCAPE = str.maketrans({'\n': '\\n', '"': '\\"'})
+
+def _flatten(values: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested dictionaries into a mapping of dotted path to leaf value.
+    
+    Args:
+        values: Nested dictionary
+        prefix: Path of values in the outer dictionary
+        
+    Returns:
+        Dict[str, Any]: Leaf values by dotted path, e.g. {"tls.enabled": True}
+    """
+    flat = {}
+    for key, value in values.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+class _LiteralDumper(SafeDumper):
+    """YAML dumper that writes multi-line strings as literal blocks."""
+
+def _represent_str(dumper: SafeDumper, value: str):
+    style = '|' if '\n' in value else None
+    return dumper.represent_scalar('tag:yaml.org,2002:str', value, style=style)
+
+_LiteralDumper.add_representer(str, _represent_str)
+
+def _application_manifest(name: str, repo_url: str, path: str, target_revision: str,
+                          helm: Dict[str, Any], automated: Dict[str, bool],
+                          sync_options: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Build an ArgoCD Application manifest.
+    
+    Args:
+        name: Name of the application
+        repo_url: Git repository of the chart
+        path: Path of the chart in the repository
+        target_revision: Target revision for the git repository
+        helm: Helm section of the application source
+        automated: Automated sync policy
+        sync_options: Optional sync options
+        
+    Returns:
+        Dict[str, Any]: Application manifest
+    """
+    sync_policy: Dict[str, Any] = {'automated': automated}
+    if sync_options:
+        sync_policy['syncOptions'] = sync_options
+    
+    return {
+        'apiVersion': 'argoproj.io/v1alpha1',
+        'kind': 'Application',
+        'metadata': {
+            'name': name,
+            'namespace': 'argocd'
+        },
+        'spec': {
+            'project': 'default',
+            'source': {
+                'helm': helm,
+                'repoURL': repo_url,
+                'targetRevision': target_revision,
+                'path': path
+            },
+            'destination': {
+                'server': 'https://kubernetes.default.svc',
+                'namespace': 'default'
+            },
+            'syncPolicy': sync_policy
+        }
+    }
+
 class ArgoCDApplication:
     """Class for creating and managing ArgoCD Applications."""
     
     def __init__(self, kubeconfig: Optional[Path] = None):
         """Initialize with optional kubeconfig path."""
-        # Start with current environment
-        self.env = os.environ.copy()
+        # Inherit the current environment unless a kubeconfig override is needed
+        self.env: Optional[Dict[str, str]] = None
         
         # Add kubeconfig if provided
         if kubeconfig:
-            self.env["KUBECONFIG"] = str(kubeconfig)
+            self.env = {**os.environ, "KUBECONFIG": str(kubeconfig)}
             logger.debug(f"ArgoCDApplication using kubeconfig: {kubeconfig}")
             
         # Find kubectl path
-        self.kubectl_path = self._find_kubectl()
+        self.kubectl_path = find_kubectl()
         if not self.kubectl_path:
             logger.warning("kubectl command not found in PATH or common locations")
     
-    def _find_kubectl(self) -> Optional[str]:
-        """Find kubectl in the system PATH."""
-        # Common locations to check
-        common_paths = [
-            "/usr/bin/kubectl",
-            "/usr/local/bin/kubectl",
-            "/snap/bin/kubectl"
-        ]
-        
-        # Check if kubectl is in PATH
-        for path in common_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
-                logger.debug(f"Found kubectl at: {path}")
-                return path
-                
-        # Try to find kubectl in PATH
-        try:
-            which_result = subprocess.run(
-                ["which", "kubectl"],
-                env=self.env,
-                check=True,
-                capture_output=True
-            )
-            kubectl_path = which_result.stdout.decode().strip()
-            if kubectl_path:
-                logger.debug(f"Found kubectl using 'which': {kubectl_path}")
-                return kubectl_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-            
-        return None
-    
     def apply_manifest(self, manifest: Dict[str, Any]) -> bool:
         """Apply a Kubernetes manifest using kubectl."""
+        return self.apply_manifests([manifest])
+    
+    def apply_manifests(self, manifests: List[Dict[str, Any]]) -> bool:
+        """Apply several Kubernetes manifests with a single kubectl invocation.
+        
+        Args:
+            manifests: Manifests to apply, in order
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
         if not self.kubectl_path:
             logger.error("kubectl command not found. Please ensure kubectl is installed and in PATH")
             return False
             
-        manifest_yaml = yaml.dump(manifest)
-        temp_file = None
+        manifest_yaml = yaml.dump_all(manifests, Dumper=SafeDumper, encoding='utf-8')
         try:
-            # Create a temporary file for the manifest
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-                temp_file = Path(f.name)
-                f.write(manifest_yaml)
+            logger.debug(f"Environment variables: KUBECONFIG={(self.env or os.environ).get('KUBECONFIG', 'not set')}")
             
-            logger.debug(f"Created temporary manifest file: {temp_file}")
-            logger.debug(f"Environment variables: KUBECONFIG={self.env.get('KUBECONFIG', 'not set')}")
-            
-            # Apply the manifest
+            # Apply the manifests, passed to kubectl on stdin
             result = subprocess.run(
-                [self.kubectl_path, "apply", "-f", str(temp_file)],
+                [self.kubectl_path, "apply", "-f", "-"],
+                input=manifest_yaml,
                 env=self.env,
                 check=True,
                 capture_output=True
@@ -92,13 +145,9 @@ class ArgoCDApplication:
         except Exception as e:
             logger.error(f"Error applying manifest: {str(e)}")
             return False
-        finally:
-            # Clean up the temporary file
-            if temp_file and temp_file.exists():
-                temp_file.unlink()
     
     def create_dependencies_app(self, values: Dict[str, Any], target_revision: str = "HEAD") -> bool:
-        """Create or update the Dependencies application using template with parameters.
+        """Create or update the Dependencies application with parameters.
         
         Args:
             values: Dictionary of values to pass to the Helm chart
@@ -110,32 +159,26 @@ class ArgoCDApplication:
         logger.info("Creating/updating Dependencies application")
         
         try:
-            # Get template path
-            template_path = get_template_path("argocd/cm-stack-dependencies-root-app.yaml")
-            
-            # Read template content
-            template_content = template_path.read_text()
-            
-            # Replace placeholders directly since this is a simple template
-            manifest_yaml = template_content
-            
-            # Replace targetRevision
-            manifest_yaml = manifest_yaml.replace("{targetRevision}", target_revision)
-            
-            # Replace deploy.cert_manager
-            cert_manager_value = 'true' if values.get('deploy', {}).get('cert_manager', False) else 'false'
-            manifest_yaml = manifest_yaml.replace("{deploy.cert_manager}", cert_manager_value)
-            
-            # Replace deploy.longhorn_csi
-            longhorn_value = 'true' if values.get('deploy', {}).get('longhorn_csi', False) else 'false'
-            manifest_yaml = manifest_yaml.replace("{deploy.longhorn_csi}", longhorn_value)
-            
-            # Replace deploy.nvidia_plugin
-            nvidia_value = 'true' if values.get('deploy', {}).get('nvidia_plugin', False) else 'false'
-            manifest_yaml = manifest_yaml.replace("{deploy.nvidia_plugin}", nvidia_value)
+            deploy = values.get('deploy', {})
+            parameters = [
+                {'name': f'deploy.{component}',
+                 'value': 'true' if deploy.get(component, False) else 'false'}
+                for component in ('cert_manager', 'longhorn_csi', 'nvidia_plugin')
+            ]
+            # Let the child apps follow the source of this application
+            parameters += [
+                {'name': 'source.repoURL', 'value': '$ARGOCD_APP_SOURCE_REPO_URL'},
+                {'name': 'source.targetRevision', 'value': '$ARGOCD_APP_SOURCE_TARGET_REVISION'}
+            ]
             
-            # Parse manifest
-            manifest = yaml.safe_load(manifest_yaml)
+            manifest = _application_manifest(
+                name="cm-stack-dependencies-root-app",
+                repo_url=DEPENDENCIES_REPO_URL,
+                path="apps",
+                target_revision=target_revision,
+                helm={'parameters': parameters},
+                automated={'selfHeal': True, 'prune': True}
+            )
             
             logger.debug(f"Dependencies application manifest: {manifest}")
             return self.apply_manifest(manifest)
@@ -144,7 +187,7 @@ class ArgoCDApplication:
             return False
 
     def create_base_app(self, values: Dict[str, Any], target_revision: str = "HEAD") -> bool:
-        """Create or update the Base application using template with explicit parameters.
+        """Create or update the Base application with explicit parameters.
         
         Args:
             values: Dictionary of values to pass to the Helm chart
@@ -156,48 +199,17 @@ class ArgoCDApplication:
         logger.info("Creating/updating Base application")
         
         try:
-            # Get template path
-            template_path = get_template_path("argocd/cm-stack-base.yaml")
-            
-            # Read template content
-            template_content = template_path.read_text()
-            
-            # Replace targetRevision
-            template_content = template_content.replace("{targetRevision}", target_revision)
-            
             # Load defaults
-            defaults_path = Path(__file__).parent.parent / "config" / "defaults.yaml"
-            defaults = {}
-            if defaults_path.exists():
-                with open(defaults_path, 'r') as f:
-                    defaults = yaml.safe_load(f)
-                logger.debug("Loaded defaults from defaults.yaml")
-            else:
-                logger.warning(f"Defaults file not found at {defaults_path}")
+            defaults = load_defaults()
+            if not defaults:
+                logger.warning("No defaults found in defaults.yaml")
             
             # Merge defaults with provided values (values take precedence)
             merged_values = self._deep_merge(defaults, values)
             
-            # Create a copy of the manifest for modification
-            manifest_yaml = template_content
+            # Flatten once, so values are looked up by their dotted path
+            flat_values = _flatten(merged_values)
             
-            # Helper function to format multi-line values with consistent indentation
-            def format_multiline_value(value):
-                """Format a multi-line value for YAML with consistent indentation.
-                
-                This preserves the content but ensures each line after the first has
-                the same indentation.
-                """
-                if not value or not isinstance(value, str):
-                    return ""
-                
-                # Split the string into lines
-                lines = value.strip().split('\n')
-                
-                # Join with newlines and consistent indentation (matching the template)
-                return "\n            ".join(lines)
-                
-            # Helper function to properly format parameter values
             def format_value(value):
                 """Format a value for use in Helm parameters."""
                 if value is None:
@@ -209,70 +221,67 @@ class ArgoCDApplication:
                 # Multi-line strings need special handling for parameters
                 if isinstance(value, str) and '\n' in value:
                     # Replace newlines with literal \n for parameters
-                    return value.replace('\n', '\\n').replace('"', '\\"')
+                    return value.translate(_PARAM_ESCAPE)
                     
                 return str(value)
             
-            # Helper function to get a formatted value from the merged dictionary
-            def get_formatted_value(path):
-                """Get formatted value from nested dictionary using dot notation path."""
-                parts = path.split('.')
-                current = merged_values
-                
-                for part in parts:
-                    if isinstance(current, dict) and part in current:
-                        current = current[part]
-                    else:
-                        return ""
-                
-                return format_value(current)
+            def multiline_value(path):
+                """Get a multi-line value, stripped of surrounding whitespace."""
+                value = flat_values.get(path)
+                return value.strip() if isinstance(value, str) else ""
             
-            # Multi-line values that need special formatting
-            multiline_values = [
-                'tls.ownCert.fullchainCertificate',
-                'tls.ownCert.privateKey',
-                'secrets.cmStackMainRepoKey',
-                'secrets.cmImageRegistryAuth',
-                'istio.jwkConfig'
+            base_domain = format_value(flat_values.get('base_domain'))
+            parameters = [
+                # DNS configuration
+                {'name': 'dns.authHost', 'value': f'auth.{base_domain}'},
+                {'name': 'dns.host', 'value': f'api.{base_domain}'},
+                {'name': 'dns.portalHost', 'value': f'portal.{base_domain}'},
+                {'name': 'dns.toolsHost', 'value': f'tools.{base_domain}'}
             ]
-            
-            # Process multi-line values
-            for value_path in multiline_values:
-                parts = value_path.split('.')
-                current = merged_values
-                
-                # Navigate to the value
-                for part in parts:
-                    if isinstance(current, dict) and part in current:
-                        current = current[part]
-                    else:
-                        current = ""
-                        break
-                
-                # Format the value if it's a string
-                if isinstance(current, str):
-                    formatted_value = format_multiline_value(current)
-                    manifest_yaml = manifest_yaml.replace(f"{{{value_path}}}", formatted_value)
-            
-            # Replace all other placeholders in the template
-            placeholders = [
-                'base_domain',
-                'tls.enabled',
-                'tls.certManager.enabled',
-                'tls.certManager.email',
-                'tls.ownCert.useOwnCert',
-                'db.backup.enabled',
-                'db.backup.volumeSnapshot.className',
-                'db.backup.retentionPolicy',
-                'db.backup.schedule'
+            # TLS and database backup configuration
+            parameters += [
+                {'name': path, 'value': format_value(flat_values.get(path))}
+                for path in (
+                    'tls.enabled',
+                    'tls.certManager.enabled',
+                    'tls.certManager.email',
+                    'tls.ownCert.useOwnCert',
+                    'db.backup.enabled',
+                    'db.backup.volumeSnapshot.className',
+                    'db.backup.retentionPolicy',
+                    'db.backup.schedule'
+                )
             ]
             
-            for placeholder in placeholders:
-                value = get_formatted_value(placeholder)
-                manifest_yaml = manifest_yaml.replace(f"{{{placeholder}}}", value)
+            # Multi-line values are passed as a values file instead of parameters
+            multiline_values = {
+                'tls': {
+                    'ownCert': {
+                        'fullchainCertificate': multiline_value('tls.ownCert.fullchainCertificate'),
+                        'privateKey': multiline_value('tls.ownCert.privateKey')
+                    }
+                },
+                'secrets': {
+                    'cmStackMainRepoKey': multiline_value('secrets.cmStackMainRepoKey'),
+                    'cmImageRegistryAuth': multiline_value('secrets.cmImageRegistryAuth')
+                },
+                'istio': {
+                    'jwkConfig': multiline_value('istio.jwkConfig')
+                }
+            }
             
-            # Parse the manifest
-            manifest = yaml.safe_load(manifest_yaml)
+            manifest = _application_manifest(
+                name="cm-stack-base",
+                repo_url=BASE_REPO_URL,
+                path="helm",
+                target_revision=target_revision,
+                helm={
+                    'parameters': parameters,
+                    'values': yaml.dump(multiline_values, Dumper=_LiteralDumper, sort_keys=False)
+                },
+                automated={'prune': True, 'selfHeal': True},
+                sync_options=['CreateNamespace=true']
+            )
             
             logger.debug(f"Base application manifest: {manifest}")
             return self.apply_manifest(manifest)
@@ -323,12 +332,13 @@ class ArgoCDApplication:
                 [self.kubectl_path, "delete", "application", name, "-n", namespace],
                 env=self.env,
                 check=True,
-                capture_output=True
+                capture_output=True,
+                text=True
             )
-            logger.info(f"Deleted application: {result.stdout.decode().strip()}")
+            logger.info(f"Deleted application: {result.stdout.strip()}")
             return True
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to delete application: {e.stderr.decode()}")
+            logger.error(f"Failed to delete application: {e.stderr}")
             return False
         except Exception as e:
             logger.error(f"Error deleting application: {str(e)}")
@@ -1,12 +1,22 @@
+import binascii
 import subprocess
 import time
 from pathlib import Path
 import logging
 import os
+import shutil
+from functools import lru_cache
 from typing import Optional, Dict
 
+from cm_deployer.k8s.session import get_api_client
+
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
+def _find_helm() -> Optional[str]:
+    """Find helm in the system PATH, once per process."""
+    return shutil.which("helm")
+
 class HelmOperations:
     def __init__(self, kubeconfig: Optional[Path] = None):
         """Initialize Helm operations.
@@ -14,50 +24,18 @@ class HelmOperations:
         Args:
             kubeconfig: Path to kubeconfig file. Uses default if None.
         """
-        # Start with current environment
-        self.env = os.environ.copy()
+        # Inherit the current environment unless a kubeconfig override is needed
+        self.env: Optional[Dict[str, str]] = None
         
         # Add kubeconfig if provided
         if kubeconfig:
-            self.env["KUBECONFIG"] = str(kubeconfig)
+            self.env = {**os.environ, "KUBECONFIG": str(kubeconfig)}
             logger.debug(f"Using kubeconfig: {kubeconfig}")
-
-    def add_repo(self, name: str, url: str) -> bool:
-        """Add a Helm repository."""
-        try:
-            subprocess.run(
-                ["helm", "repo", "add", name, url],
-                env=self.env,
-                check=True,
-                capture_output=True
-            )
-            return True
-        except subprocess.CalledProcessError as e:
-            if b"already exists" in e.stderr:
-                logger.info(f"Helm repo {name} already exists")
-                return True
-            logger.error(f"Failed to add Helm repo: {e.stderr.decode()}")
-            return False
-        except FileNotFoundError:
-            logger.error("helm command not found. Please ensure Helm is installed and in PATH")
-            return False
-
-    def update_repos(self) -> bool:
-        """Update all Helm repositories."""
-        try:
-            subprocess.run(
-                ["helm", "repo", "update"],
-                env=self.env,
-                check=True,
-                capture_output=True
-            )
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to update Helm repos: {e.stderr.decode()}")
-            return False
-        except FileNotFoundError:
-            logger.error("helm command not found. Please ensure Helm is installed and in PATH")
-            return False
+        
+        # Run helm by absolute path; if it is missing, the calls report it
+        self.helm_path = _find_helm() or "helm"
+        if self.helm_path == "helm":
+            logger.debug("helm command not found in PATH")
 
     def upgrade_install(
         self,
@@ -66,10 +44,18 @@ class HelmOperations:
         version: Optional[str] = None,
         namespace: str = "default",
         create_namespace: bool = False,
-        values_file: Optional[Path] = None
+        values_file: Optional[Path] = None,
+        repo_url: Optional[str] = None
     ) -> bool:
-        """Install or upgrade a Helm release."""
-        cmd = ["helm", "upgrade", "--install", release, chart, "--namespace", namespace]
+        """Install or upgrade a Helm release.
+        
+        If repo_url is given, chart is the unqualified chart name and is
+        fetched from that repository directly, without a named local repo.
+        """
+        cmd = [self.helm_path, "upgrade", "--install", release, chart, "--namespace", namespace]
+        
+        if repo_url:
+            cmd.extend(["--repo", repo_url])
         
         if version:
             cmd.extend(["--version", version])
@@ -85,11 +71,13 @@ class HelmOperations:
                 cmd,
                 env=self.env,
                 check=True,
-                capture_output=True
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True
             )
             return True
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to install/upgrade Helm release: {e.stderr.decode()}")
+            logger.error(f"Failed to install/upgrade Helm release: {e.stderr}")
             return False
         except FileNotFoundError:
             logger.error("helm command not found. Please ensure Helm is installed and in PATH")
@@ -99,12 +87,13 @@ class ArgoCDInstaller:
     def __init__(self, kubeconfig: Optional[Path] = None):
         """Initialize ArgoCD installer."""
         self.helm = HelmOperations(kubeconfig)
-        # Store kubeconfig and env for other commands
+        # Store kubeconfig for API calls
         self.kubeconfig = kubeconfig
-        self.env = os.environ.copy()
         if kubeconfig:
-            self.env["KUBECONFIG"] = str(kubeconfig)
             logger.debug(f"ArgoCDInstaller using kubeconfig: {kubeconfig}")
+        
+        # Admin credentials do not change during a deployment, cache them once read
+        self._credentials: Optional[Dict[str, str]] = None
 
     def install(self) -> bool:
         """Install ArgoCD with minimal configuration.
@@ -115,16 +104,13 @@ class ArgoCDInstaller:
         Returns:
             bool: True if successful, False otherwise
         """
-        # Add and update Helm repo
-        if not (self.helm.add_repo("argo", "https://argoproj.github.io/argo-helm") and
-                self.helm.update_repos()):
-            return False
-
-        # Install ArgoCD with default configuration
+        # Install ArgoCD with default configuration, straight from the chart
+        # repository so no local Helm repo has to be added and updated first.
         # The cm-argocd-self-config app will handle specific configuration
         success = self.helm.upgrade_install(
             release="argocd",
-            chart="argo/argo-cd",
+            chart="argo-cd",
+            repo_url="https://argoproj.github.io/argo-helm",
             version="7.8.2",
             namespace="argocd",
             create_namespace=True
@@ -137,72 +123,131 @@ class ArgoCDInstaller:
         return success
 
     def wait_ready(self, timeout_seconds: int = 300) -> bool:
-        """Wait for ArgoCD to be ready."""
-        cmd = [
-            "kubectl", "wait", "--for=condition=available",
-            "--timeout", f"{timeout_seconds}s",
-            "-n", "argocd", "deployment", "-l", "app.kubernetes.io/name=argocd-server"
-        ]
-
+        """Wait for ArgoCD to be ready.
+        
+        Watches the argocd-server deployment and returns as soon as it
+        reports the Available condition.
+        """
+        from kubernetes import client, watch
+        
+        deadline = time.monotonic() + timeout_seconds
         try:
-            subprocess.run(
-                cmd,
-                env=self.env,  # Use the environment with KUBECONFIG
-                check=True,
-                capture_output=True
-            )
-            logger.info("ArgoCD is ready")
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"ArgoCD failed to become ready: {e.stderr.decode()}")
+            apps_api = client.AppsV1Api(get_api_client(self.kubeconfig))
+            
+            while (remaining := int(deadline - time.monotonic())) > 0:
+                w = watch.Watch()
+                try:
+                    for event in w.stream(apps_api.list_namespaced_deployment,
+                                          namespace="argocd",
+                                          label_selector="app.kubernetes.io/name=argocd-server",
+                                          timeout_seconds=remaining):
+                        if event["type"] == "DELETED":
+                            continue
+                        
+                        conditions = event["object"].status.conditions or []
+                        if any(c.type == "Available" and c.status == "True" for c in conditions):
+                            w.stop()
+                            logger.info("ArgoCD is ready")
+                            return True
+                except client.rest.ApiException as e:
+                    if e.status != 410:
+                        raise
+                    logger.debug("Watch for ArgoCD server deployment expired, restarting")
+        except client.rest.ApiException as e:
+            logger.error(f"ArgoCD failed to become ready: {e.status} {e.reason}")
             return False
-        except FileNotFoundError:
-            logger.error("kubectl command not found. Please ensure kubectl is installed and in PATH")
+        except Exception as e:
+            logger.error(f"Error waiting for ArgoCD to become ready: {str(e)}")
             return False
+        
+        logger.error(f"ArgoCD failed to become ready within {timeout_seconds}s")
+        return False
 
-    def get_argocd_credentials(self) -> Dict[str, str]:
+    def _wait_for_secret(self, name: str, namespace: str, key: str, timeout_seconds: int):
+        """Wait until a secret exists and has a value for key.
+        
+        Watches the secret by name, so an existing secret is returned with
+        the first event and a new one as soon as it is created.
+        
+        Args:
+            name: Name of the secret
+            namespace: Namespace of the secret
+            key: Data key that must be set
+            timeout_seconds: Maximum time to wait
+            
+        Returns:
+            kubernetes.client.V1Secret: The secret, or None on timeout
+        """
+        from kubernetes import client, watch
+        
+        core_api = client.CoreV1Api(get_api_client(self.kubeconfig))
+        deadline = time.monotonic() + timeout_seconds
+        while (remaining := int(deadline - time.monotonic())) > 0:
+            w = watch.Watch()
+            try:
+                for event in w.stream(core_api.list_namespaced_secret,
+                                      namespace=namespace,
+                                      field_selector=f"metadata.name={name}",
+                                      timeout_seconds=remaining):
+                    secret = event["object"]
+                    if event["type"] in ("ADDED", "MODIFIED") and (secret.data or {}).get(key):
+                        w.stop()
+                        return secret
+            except client.rest.ApiException as e:
+                if e.status != 410:
+                    raise
+                logger.debug(f"Watch for secret {namespace}/{name} expired, restarting")
+        
+        return None
+
+    def get_argocd_credentials(self, timeout_seconds: int = 60) -> Dict[str, str]:
         """Get ArgoCD initial admin credentials.
         
+        Waits for the initial admin secret if ArgoCD has not created it yet.
+        The result of the first call is cached, including the placeholder
+        returned when the secret is missing (operators delete it after
+        changing the password), so only the first call can wait.
+        
+        Args:
+            timeout_seconds: Maximum time to wait for the secret
+        
         Returns:
             dict: A dictionary with 'username' and 'password' keys
         """
+        if self._credentials is None:
+            self._credentials = self._read_argocd_credentials(timeout_seconds)
+        return self._credentials
+    
+    def _read_argocd_credentials(self, timeout_seconds: int) -> Dict[str, str]:
+        """Read the ArgoCD admin credentials from the initial admin secret."""
+        from kubernetes import client
+        
         try:
-            # Find kubectl in PATH
-            kubectl_cmd = self._find_kubectl()
-            if not kubectl_cmd:
-                logger.error("kubectl command not found in PATH")
-                return {
-                    "username": "admin",
-                    "password": "error-kubectl-not-found"
-                }
-                
             # Get the ArgoCD admin password secret
-            result = subprocess.run(
-                [kubectl_cmd, "get", "secret", "argocd-initial-admin-secret", "-n", "argocd", 
-                 "-o", "jsonpath='{.data.password}'"],
-                env=self.env,  # Use the environment with KUBECONFIG
-                check=True,
-                capture_output=True
+            secret = self._wait_for_secret(
+                name="argocd-initial-admin-secret",
+                namespace="argocd",
+                key="password",
+                timeout_seconds=timeout_seconds
             )
-            
-            # Decode the base64 password
-            encoded_password = result.stdout.decode().strip("'")
-            if not encoded_password:
-                logger.warning("ArgoCD password is empty")
+            if secret is None:
+                logger.error(f"ArgoCD admin password not available within {timeout_seconds}s")
                 return {
                     "username": "admin",
-                    "password": "empty-password"
+                    "password": "unknown - error retrieving password"
                 }
             
-            import base64
-            password = base64.b64decode(encoded_password).decode()
+            # Decode the base64 password
+            encoded_password = secret.data["password"]
+            
+            password = binascii.a2b_base64(encoded_password).decode()
             
             return {
                 "username": "admin",
                 "password": password
             }
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to get ArgoCD credentials: {e.stderr.decode()}")
+        except client.rest.ApiException as e:
+            logger.error(f"Failed to get ArgoCD credentials: {e.status} {e.reason}")
             return {
                 "username": "admin",
                 "password": "unknown - error retrieving password"
@@ -213,35 +258,3 @@ class ArgoCDInstaller:
                 "username": "admin",
                 "password": "unknown - error processing password"
             }
-            
-    def _find_kubectl(self) -> Optional[str]:
-        """Find kubectl in the system PATH."""
-        # Common locations to check
-        common_paths = [
-            "/usr/bin/kubectl",
-            "/usr/local/bin/kubectl",
-            "/snap/bin/kubectl"
-        ]
-        
-        # Check if kubectl is in PATH
-        for path in common_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
-                logger.debug(f"Found kubectl at: {path}")
-                return path
-                
-        # Try to find kubectl in PATH
-        try:
-            which_result = subprocess.run(
-                ["which", "kubectl"],
-                env=self.env,
-                check=True,
-                capture_output=True
-            )
-            kubectl_path = which_result.stdout.decode().strip()
-            if kubectl_path:
-                logger.debug(f"Found kubectl using 'which': {kubectl_path}")
-                return kubectl_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-            
-        return None
\ No newline at end of file
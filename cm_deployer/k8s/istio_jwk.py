@@ -1,11 +1,18 @@
-import base64
+import binascii
 import logging
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
+
+from cm_deployer.k8s.session import FIELD_MANAGER, backoff_delay, get_api_client
 
 logger = logging.getLogger(__name__)
 
+# Server-side apply requests are retried on these transient API errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+APPLY_ATTEMPTS = 5
+
 class IstioJWKResourceProvisioner:
     """Class for provisioning JWK resources for Istio JWT authentication in Kubernetes."""
     
@@ -16,11 +23,6 @@ class IstioJWKResourceProvisioner:
             kubeconfig: Path to kubeconfig file (for Kubernetes operations)
         """
         self.kubeconfig = kubeconfig
-        
-        # Prepare environment with kubeconfig
-        self.env = os.environ.copy()
-        if kubeconfig:
-            self.env["KUBECONFIG"] = str(kubeconfig)
     
     def provision_resources(self, private_key: str, jwk: str) -> bool:
         """Provision Kubernetes resources for Istio JWT authentication.
@@ -29,6 +31,10 @@ class IstioJWKResourceProvisioner:
         - Secret with private key in api-services namespace
         - ConfigMap with JWK in istio-system namespace
         
+        Each namespace and object is created or updated with a single
+        server-side apply request, and the two namespaces are handled
+        concurrently since they are independent.
+        
         Args:
             private_key: Private key content as string
             jwk: JWK content as string
@@ -36,22 +42,13 @@ class IstioJWKResourceProvisioner:
         Returns:
             bool: True if provisioning was successful
         """
-        from kubernetes import client, config
+        import urllib3
+        from kubernetes import client
         
         try:
-            # Load Kubernetes configuration
-            if self.kubeconfig:
-                config.load_kube_config(config_file=str(self.kubeconfig))
-            else:
-                config.load_kube_config()
+            api_instance = client.CoreV1Api(get_api_client(self.kubeconfig))
             
-            # Create api-services namespace if it doesn't exist
-            self._create_namespace("api-services")
-            
-            # Create Secret for private key
-            api_instance = client.CoreV1Api()
-            
-            # Create Secret for private key
+            # Secret for private key
             secret_body = client.V1Secret(
                 api_version="v1",
                 kind="Secret",
@@ -64,25 +61,7 @@ class IstioJWKResourceProvisioner:
                 }
             )
             
-            # Create or update the Secret
-            try:
-                api_instance.create_namespaced_secret(
-                    namespace="api-services",
-                    body=secret_body
-                )
-                logger.info("Created private key Secret")
-            except client.rest.ApiException as e:
-                if e.status == 409:  # Conflict, already exists
-                    api_instance.replace_namespaced_secret(
-                        name="private-key-secret",
-                        namespace="api-services",
-                        body=secret_body
-                    )
-                    logger.info("Updated private key Secret")
-                else:
-                    raise
-            
-            # Create ConfigMap for JWK
+            # ConfigMap for JWK
             config_map_body = client.V1ConfigMap(
                 api_version="v1",
                 kind="ConfigMap",
@@ -98,63 +77,77 @@ class IstioJWKResourceProvisioner:
                 }
             )
             
-            # Create istio-system namespace if it doesn't exist
-            self._create_namespace("istio-system")
+            def apply_secret():
+                self._apply_namespace("api-services")
+                self._apply(api_instance.patch_namespaced_secret, secret_body,
+                            name="private-key-secret", namespace="api-services")
+                logger.info("Applied private key Secret")
             
-            # Create or update the ConfigMap
-            try:
-                api_instance.create_namespaced_config_map(
-                    namespace="istio-system",
-                    body=config_map_body
-                )
-                logger.info("Created JWK ConfigMap in istio-system namespace")
-            except client.rest.ApiException as e:
-                if e.status == 409:  # Conflict, already exists
-                    api_instance.replace_namespaced_config_map(
-                        name="jwk-config",
-                        namespace="istio-system",
-                        body=config_map_body
-                    )
-                    logger.info("Updated JWK ConfigMap in istio-system namespace")
-                else:
-                    raise
+            def apply_config_map():
+                self._apply_namespace("istio-system")
+                self._apply(api_instance.patch_namespaced_config_map, config_map_body,
+                            name="jwk-config", namespace="istio-system")
+                logger.info("Applied JWK ConfigMap in istio-system namespace")
+            
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(apply_secret), executor.submit(apply_config_map)]
+                for future in as_completed(futures):
+                    future.result()
             
             return True
             
-        except Exception as e:
+        except client.rest.ApiException as e:
+            logger.error(f"Failed to provision Istio JWK resources: {e.status} {e.reason}")
+            return False
+        except urllib3.exceptions.HTTPError as e:
             logger.error(f"Error provisioning Istio JWK resources: {str(e)}")
             return False
     
-    def _create_namespace(self, namespace: str) -> bool:
+    def _apply_namespace(self, namespace: str) -> None:
         """Create a Kubernetes namespace if it doesn't exist."""
         from kubernetes import client
         
-        api_instance = client.CoreV1Api()
+        api_instance = client.CoreV1Api(get_api_client(self.kubeconfig))
+        namespace_body = client.V1Namespace(
+            api_version="v1",
+            kind="Namespace",
+            metadata=client.V1ObjectMeta(
+                name=namespace
+            )
+        )
+        self._apply(api_instance.patch_namespace, namespace_body, name=namespace)
+        logger.debug(f"Applied namespace {namespace}")
+    
+    def _apply(self, patch_method: Callable[..., Any], body: Any, **kwargs) -> None:
+        """Create or update an object with a server-side apply request.
         
-        try:
-            api_instance.read_namespace(namespace)
-            logger.debug(f"Namespace {namespace} already exists")
-            return True
-        except client.rest.ApiException as e:
-            if e.status == 404:
-                # Namespace doesn't exist, create it
-                namespace_body = client.V1Namespace(
-                    metadata=client.V1ObjectMeta(
-                        name=namespace
-                    )
+        Transient API server errors, common while a cluster is still
+        bootstrapping, are retried with exponential backoff.
+        
+        Args:
+            patch_method: The API's patch method for the object kind
+            body: The full object to apply, including api_version and kind
+            **kwargs: Name and namespace arguments for patch_method
+        """
+        from kubernetes import client
+        
+        for attempt in range(1, APPLY_ATTEMPTS + 1):
+            try:
+                patch_method(
+                    body=body,
+                    field_manager=FIELD_MANAGER,
+                    force=True,
+                    _content_type="application/apply-patch+yaml",
+                    **kwargs
                 )
-                
-                try:
-                    api_instance.create_namespace(body=namespace_body)
-                    logger.info(f"Created namespace {namespace}")
-                    return True
-                except Exception as e:
-                    logger.error(f"Error creating namespace {namespace}: {str(e)}")
-                    return False
-            else:
-                logger.error(f"Error checking namespace {namespace}: {str(e)}")
-                return False
+                return
+            except client.rest.ApiException as e:
+                if e.status not in RETRY_STATUSES or attempt == APPLY_ATTEMPTS:
+                    raise
+                delay = backoff_delay(attempt, 8.0)
+                logger.debug(f"Apply of {kwargs.get('name')} failed with {e.status}, retrying in {delay:.2f}s")
+                time.sleep(delay)
     
     def _encode_base64(self, data: str) -> str:
         """Encode string to base64 as required by Kubernetes secrets."""
-        return base64.b64encode(data.encode()).decode()
\ No newline at end of file
+        return binascii.b2a_base64(data.encode(), newline=False).decode("ascii")
@@ -0,0 +1,85 @@
+import logging
+import os
+import random
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Enough connections for the helpers that call the API concurrently
+CONNECTION_POOL_MAXSIZE = 16
+
+# Field manager recorded for server-side apply
+FIELD_MANAGER = "cm-deployer"
+
+
+@lru_cache(maxsize=None)
+def get_api_client(kubeconfig: Optional[Path] = None):
+    """Get the Kubernetes API client for a kubeconfig file.
+
+    The client is built once per kubeconfig and shared by all helpers, so
+    the kubeconfig is parsed once and connections are reused. It has its
+    own configuration object and does not touch the global default
+    configuration of the kubernetes package.
+
+    Args:
+        kubeconfig: Path to kubeconfig file. Uses default if None.
+
+    Returns:
+        kubernetes.client.ApiClient: API client for the cluster
+    """
+    from kubernetes import client, config
+
+    config_file = str(kubeconfig) if kubeconfig else None
+    logger.debug(f"Loading Kubernetes API client from kubeconfig: {config_file or 'default'}")
+    client_config = client.Configuration()
+    client_config.connection_pool_maxsize = CONNECTION_POOL_MAXSIZE
+    config.load_kube_config(config_file=config_file, client_configuration=client_config)
+    return client.ApiClient(configuration=client_config)
+
+
+@lru_cache(maxsize=1)
+def find_kubectl() -> Optional[str]:
+    """Find kubectl in common locations or the system PATH.
+
+    The lookup is done once per process and shared by all helpers.
+
+    Returns:
+        Optional[str]: Path to kubectl, or None if it is not found
+    """
+    # Common locations to check
+    common_paths = [
+        "/usr/bin/kubectl",
+        "/usr/local/bin/kubectl",
+        "/snap/bin/kubectl"
+    ]
+
+    for path in common_paths:
+        if os.access(path, os.X_OK):
+            logger.debug(f"Found kubectl at: {path}")
+            return path
+
+    # Try to find kubectl in PATH
+    kubectl_path = shutil.which("kubectl")
+    if kubectl_path:
+        logger.debug(f"Found kubectl in PATH: {kubectl_path}")
+    return kubectl_path
+
+
+def backoff_delay(attempt: int, max_delay: float, base_delay: float = 0.25) -> float:
+    """Get the delay before the next check of a polling loop.
+
+    The delay doubles with every attempt, starting at base_delay and capped
+    at max_delay, with some jitter so concurrent pollers spread out.
+
+    Args:
+        attempt: Number of checks made so far, starting at 0
+        max_delay: Upper bound of the delay in seconds
+        base_delay: Delay after the first check in seconds
+
+    Returns:
+        float: Delay in seconds
+    """
+    return min(base_delay * 2 ** min(attempt, 16) + random.uniform(0, base_delay), max_delay)
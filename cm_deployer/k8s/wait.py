@@ -1,11 +1,10 @@
 import logging
 import time
-import subprocess
-import json
-import os
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
+from cm_deployer.k8s.session import backoff_delay, get_api_client
+
 logger = logging.getLogger(__name__)
 
 class ArgoCDAppWaiter:
@@ -13,50 +12,10 @@ class ArgoCDAppWaiter:
     
     def __init__(self, kubeconfig: Optional[Path] = None):
         """Initialize with optional kubeconfig path."""
-        # Start with current environment
-        self.env = os.environ.copy()
+        self.kubeconfig = kubeconfig
         
-        # Add kubeconfig if provided
         if kubeconfig:
-            self.env["KUBECONFIG"] = str(kubeconfig)
             logger.debug(f"ArgoCDAppWaiter using kubeconfig: {kubeconfig}")
-            
-        # Find kubectl path
-        self.kubectl_path = self._find_kubectl()
-        if not self.kubectl_path:
-            logger.warning("kubectl command not found in PATH or common locations")
-    
-    def _find_kubectl(self) -> Optional[str]:
-        """Find kubectl in the system PATH."""
-        # Common locations to check
-        common_paths = [
-            "/usr/bin/kubectl",
-            "/usr/local/bin/kubectl",
-            "/snap/bin/kubectl"
-        ]
-        
-        # Check if kubectl is in PATH
-        for path in common_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
-                logger.debug(f"Found kubectl at: {path}")
-                return path
-                
-        # Try to find kubectl in PATH
-        try:
-            which_result = subprocess.run(
-                ["which", "kubectl"],
-                env=self.env,
-                check=True,
-                capture_output=True
-            )
-            kubectl_path = which_result.stdout.decode().strip()
-            if kubectl_path:
-                logger.debug(f"Found kubectl using 'which': {kubectl_path}")
-                return kubectl_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-            
-        return None
     
     def get_app_status(self, app_name: str, namespace: str = "argocd") -> Dict[str, Any]:
         """Get the current status of an ArgoCD application.
@@ -68,23 +27,19 @@ class ArgoCDAppWaiter:
         Returns:
             dict: Application status as a dictionary
         """
-        if not self.kubectl_path:
-            logger.error("kubectl command not found. Please ensure kubectl is installed and in PATH")
-            return {}
-            
+        from kubernetes import client
+        
         try:
-            result = subprocess.run(
-                [self.kubectl_path, "get", "application", app_name, "-n", namespace, "-o", "json"],
-                env=self.env,
-                check=True,
-                capture_output=True
+            api = client.CustomObjectsApi(get_api_client(self.kubeconfig))
+            return api.get_namespaced_custom_object(
+                group="argoproj.io",
+                version="v1alpha1",
+                namespace=namespace,
+                plural="applications",
+                name=app_name
             )
-            return json.loads(result.stdout)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to get application status: {e.stderr.decode()}")
-            return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse application status: {str(e)}")
+        except client.rest.ApiException as e:
+            logger.error(f"Failed to get application status: {e.reason}")
             return {}
         except Exception as e:
             logger.error(f"Error getting application status: {str(e)}")
@@ -171,23 +126,16 @@ class ArgoCDAppWaiter:
             app_name: Name of the ArgoCD application
             namespace: Namespace where the application is located
             timeout_seconds: Maximum time to wait in seconds
-            interval_seconds: Time between checks in seconds
+            interval_seconds: Maximum time between checks in seconds
             
         Returns:
             bool: True if the application is synced, False if timeout
         """
         logger.info(f"Waiting for application {app_name} to be synced (timeout: {timeout_seconds}s)...")
         
-        start_time = time.time()
-        while time.time() - start_time < timeout_seconds:
-            if self.is_app_synced(app_name, namespace):
-                logger.info(f"Application {app_name} is synced")
-                return True
-            
-            elapsed = int(time.time() - start_time)
-            remaining = timeout_seconds - elapsed
-            logger.info(f"Waiting for application {app_name} to be synced... ({elapsed}s elapsed, {remaining}s remaining)")
-            time.sleep(interval_seconds)
+        if self._poll_app_status(app_name, namespace, {"sync": "Synced"}, timeout_seconds, interval_seconds):
+            logger.info(f"Application {app_name} is synced")
+            return True
         
         logger.error(f"Timeout waiting for application {app_name} to be synced")
         self._log_app_status(app_name, namespace)
@@ -201,23 +149,16 @@ class ArgoCDAppWaiter:
             app_name: Name of the ArgoCD application
             namespace: Namespace where the application is located
             timeout_seconds: Maximum time to wait in seconds
-            interval_seconds: Time between checks in seconds
+            interval_seconds: Maximum time between checks in seconds
             
         Returns:
             bool: True if the application is healthy, False if timeout
         """
         logger.info(f"Waiting for application {app_name} to be healthy (timeout: {timeout_seconds}s)...")
         
-        start_time = time.time()
-        while time.time() - start_time < timeout_seconds:
-            if self.is_app_healthy(app_name, namespace):
-                logger.info(f"Application {app_name} is healthy")
-                return True
-            
-            elapsed = int(time.time() - start_time)
-            remaining = timeout_seconds - elapsed
-            logger.info(f"Waiting for application {app_name} to be healthy... ({elapsed}s elapsed, {remaining}s remaining)")
-            time.sleep(interval_seconds)
+        if self._poll_app_status(app_name, namespace, {"health": "Healthy"}, timeout_seconds, interval_seconds):
+            logger.info(f"Application {app_name} is healthy")
+            return True
         
         logger.error(f"Timeout waiting for application {app_name} to be healthy")
         self._log_app_status(app_name, namespace)
@@ -227,23 +168,158 @@ class ArgoCDAppWaiter:
                           timeout_seconds: int = 1200, interval_seconds: int = 10) -> bool:
         """Wait for an application to be both synced and healthy.
         
+        Watches the Application resource so that the transition is picked up
+        as soon as the API server reports it. Falls back to polling if the
+        watch cannot be established.
+        
         Args:
             app_name: Name of the ArgoCD application
             namespace: Namespace where the application is located
             timeout_seconds: Maximum time to wait in seconds
-            interval_seconds: Time between checks in seconds
+            interval_seconds: Maximum time between checks in seconds (polling fallback only)
             
         Returns:
             bool: True if the application is ready, False if timeout
         """
-        # Split the timeout between sync and health
-        sync_timeout = timeout_seconds // 2
-        health_timeout = timeout_seconds - sync_timeout
+        logger.info(f"Waiting for application {app_name} to be synced and healthy (timeout: {timeout_seconds}s)...")
         
-        if not self.wait_for_app_sync(app_name, namespace, sync_timeout, interval_seconds):
-            return False
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            if self._watch_app_ready(app_name, namespace, deadline):
+                logger.info(f"Application {app_name} is synced and healthy")
+                return True
+        except Exception as e:
+            remaining = int(deadline - time.monotonic())
+            if remaining > 0:
+                logger.warning(f"Watching application {app_name} failed ({str(e)}), falling back to polling")
+                return self._poll_app_ready(app_name, namespace, remaining, interval_seconds)
         
-        return self.wait_for_app_health(app_name, namespace, health_timeout, interval_seconds)
+        logger.error(f"Timeout waiting for application {app_name} to be ready")
+        self._log_app_status(app_name, namespace)
+        return False
+    
+    def _watch_app_ready(self, app_name: str, namespace: str, deadline: float) -> bool:
+        """Watch an application until it is synced and healthy or the deadline passes.
+        
+        The watch is re-established if the server closes it or if the
+        resource version we resume from has expired (HTTP 410).
+        
+        Args:
+            app_name: Name of the ArgoCD application
+            namespace: Namespace where the application is located
+            deadline: time.monotonic() value after which to give up
+            
+        Returns:
+            bool: True if the application became ready, False on timeout
+        """
+        from kubernetes import client, watch
+        
+        api = client.CustomObjectsApi(get_api_client(self.kubeconfig))
+        resource_version = None
+        last_status = None
+        
+        while (remaining := int(deadline - time.monotonic())) > 0:
+            kwargs = {
+                "field_selector": f"metadata.name={app_name}",
+                "allow_watch_bookmarks": True,
+                "timeout_seconds": remaining
+            }
+            if resource_version:
+                kwargs["resource_version"] = resource_version
+            
+            w = watch.Watch()
+            try:
+                for event in w.stream(api.list_namespaced_custom_object,
+                                      "argoproj.io", "v1alpha1", namespace, "applications",
+                                      **kwargs):
+                    obj = event["object"]
+                    resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                    if event["type"] in ("BOOKMARK", "DELETED"):
+                        continue
+                    
+                    status = obj.get("status", {})
+                    sync_status = status.get("sync", {}).get("status")
+                    health_status = status.get("health", {}).get("status")
+                    if sync_status == "Synced" and health_status == "Healthy":
+                        w.stop()
+                        return True
+                    
+                    if (sync_status, health_status) != last_status:
+                        last_status = (sync_status, health_status)
+                        logger.info(f"Application {app_name} status: Sync={sync_status}, Health={health_status}")
+            except client.rest.ApiException as e:
+                if e.status != 410:
+                    raise
+                logger.debug(f"Watch for application {app_name} expired, restarting")
+                resource_version = None
+        
+        return False
+    
+    def _poll_app_ready(self, app_name: str, namespace: str,
+                        timeout_seconds: int, interval_seconds: int) -> bool:
+        """Poll an application until it is both synced and healthy.
+        
+        Args:
+            app_name: Name of the ArgoCD application
+            namespace: Namespace where the application is located
+            timeout_seconds: Maximum time to wait in seconds
+            interval_seconds: Maximum time between checks in seconds
+            
+        Returns:
+            bool: True if the application is ready, False if timeout
+        """
+        expected = {"sync": "Synced", "health": "Healthy"}
+        if self._poll_app_status(app_name, namespace, expected, timeout_seconds, interval_seconds):
+            logger.info(f"Application {app_name} is synced and healthy")
+            return True
+        
+        return False
+    
+    def _poll_app_status(self, app_name: str, namespace: str, expected: Dict[str, str],
+                         timeout_seconds: int, interval_seconds: int) -> bool:
+        """Poll an application until its status has the expected values.
+        
+        The status is logged when it changes and otherwise only about every
+        tenth of the timeout, so long waits don't repeat the same line on
+        every check.
+        
+        Args:
+            app_name: Name of the ArgoCD application
+            namespace: Namespace where the application is located
+            expected: Expected status per status section, e.g. {"sync": "Synced"}
+            timeout_seconds: Maximum time to wait in seconds
+            interval_seconds: Maximum time between checks in seconds
+            
+        Returns:
+            bool: True if the status was reached, False if timeout
+        """
+        start_time = time.monotonic()
+        progress_interval = max(interval_seconds, timeout_seconds // 10)
+        attempt = 0
+        last_status = None
+        last_logged = 0
+        while (elapsed := int(time.monotonic() - start_time)) < timeout_seconds:
+            # One GET per check for all status sections
+            status = self.get_app_status(app_name, namespace).get("status", {})
+            current = tuple(status.get(section, {}).get("status") for section in expected)
+            if current == tuple(expected.values()):
+                return True
+            
+            # Check again quickly after a status change, back off while it is unchanged
+            changed = current != last_status
+            if changed:
+                last_status = current
+                attempt = 0
+            
+            remaining = timeout_seconds - elapsed
+            if changed or elapsed - last_logged >= progress_interval:
+                summary = ", ".join(f"{section.capitalize()}={value}" for section, value in zip(expected, current))
+                logger.info(f"Application {app_name} status: {summary} ({elapsed}s elapsed, {remaining}s remaining)")
+                last_logged = elapsed
+            time.sleep(min(backoff_delay(attempt, interval_seconds), max(0, remaining)))
+            attempt += 1
+        
+        return False
     
     def _log_app_status(self, app_name: str, namespace: str = "argocd") -> None:
         """Log detailed application status for debugging."""
@@ -0,0 +1,8 @@
+"""File operation helpers."""
+
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it,
+# they produce the same results as the pure-Python ones but much faster.
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
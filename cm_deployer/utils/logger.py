@@ -1,23 +1,48 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 
 def setup_logger(debug: bool = False):
     """Configure logging for the application.
     
+    Records are handed to a background thread through a queue, so a slow
+    stdout (e.g. a pipe to a CI log collector) doesn't hold up the waits.
+    
     Args:
         debug: Enable debug logging if True
     """
     level = logging.DEBUG if debug else logging.INFO
     
+    # Don't collect record fields the format never uses (see "Optimization"
+    # in the logging HOWTO)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.logAsyncioTasks = False
+    logging._srcfile = None
+    
+    # Write to stdout from a listener thread; it is stopped, and the queue
+    # flushed, at exit
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The queue handler only merges the arguments (and traceback) into the
+    # message, the listener's handler adds time and level
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
     # Configure root logger
     logging.basicConfig(
         level=level,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=[queue_handler]
     )
     
     # Quiet some noisy loggers
     logging.getLogger('urllib3').setLevel(logging.WARNING)
-    logging.getLogger('git').setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger('git').setLevel(logging.WARNING)